@@ -1,9 +1,43 @@
 import argparse
+import functools
+import os
 import re
-import requests
-from packaging.specifiers import SpecifierSet
-from packaging.version import Version
-from typing import List, Tuple, Dict, Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple, Dict, Set
+
+# Network, cache and packaging dependencies are imported on first use so `--help` stays fast.
+if TYPE_CHECKING:
+    import diskcache
+    import requests
+    from packaging.specifiers import SpecifierSet
+
+_REQ_LINE_RE = re.compile(r"^([a-zA-Z0-9_\-]+)==([a-zA-Z0-9._\-]+)$")
+
+_MAX_WORKERS = 16
+
+# Metadata for a pinned release does not change, so repeat runs are served from disk.
+_CACHE_DIR = os.path.expanduser("~/.cache/torchversionspecifier")
+_CACHE_EXPIRE = 86400
+
+
+@functools.lru_cache(maxsize=None)
+def _session() -> "requests.Session":
+    """Shared keep-alive session so concurrent PyPI lookups reuse TCP/TLS connections."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.3)))
+    return session
+
+
+@functools.lru_cache(maxsize=None)
+def _cache() -> "diskcache.Cache":
+    """On-disk cache shared with run.py."""
+    import diskcache
+
+    return diskcache.Cache(_CACHE_DIR)
 
 
 def read_requirements(file_path: str) -> List[Tuple[str, str]]:
@@ -15,44 +49,66 @@ def read_requirements(file_path: str) -> List[Tuple[str, str]]:
         line = line.strip()
         if not line or line.startswith("#"):
             continue
-        match = re.match(r"^([a-zA-Z0-9_\-]+)==([a-zA-Z0-9._\-]+)$", line)
+        match = _REQ_LINE_RE.match(line)
         if match:
             packages.append((match.group(1), match.group(2)))
     return packages
 
 
-def fetch_metadata_from_pypi(package: str, version: str) -> Dict:
-    """Fetch package metadata from the PyPI JSON API."""
-    url = f"https://pypi.org/pypi/{package}/{version}/json"
-    try:
-        response = requests.get(url, timeout=10)
+def extract_requires_python(metadata: Dict) -> str:
+    """Extract Requires-Python from the PyPI metadata."""
+    return metadata.get("info", {}).get("requires_python") or ""
+
+
+def _fetch_requires_python(package: str, version: str) -> str:
+    """Fetch Requires-Python from the PyPI JSON API, raising on failure so errors are not cached."""
+    import orjson
+
+    key = ("requires_python", package, version)
+    requires_python = _cache().get(key)
+    if requires_python is None:
+        url = f"https://pypi.org/pypi/{package}/{version}/json"
+        response = _session().get(url, timeout=10)
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Failed to fetch metadata for {package}=={version}: {e}")
-        return {}
+        requires_python = extract_requires_python(orjson.loads(response.content))
+        _cache().set(key, requires_python, expire=_CACHE_EXPIRE)
+    return requires_python
 
 
-def extract_requires_python(metadata: Dict) -> str:
-    """Extract Requires-Python from the PyPI metadata."""
-    return metadata.get("info", {}).get("requires_python", "")
+def fetch_requires_python(package: str, version: str) -> str:
+    """Fetch the Requires-Python specifier of a release from PyPI."""
+    import orjson
+    import requests
 
+    try:
+        return _fetch_requires_python(package, version)
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        print(f"Failed to fetch metadata for {package}=={version}: {e}")
+        return ""
 
-def parse_python_versions(specifiers: List[SpecifierSet]) -> Set[str]:
+
+def parse_python_versions(specifiers: List["SpecifierSet"]) -> Set[str]:
     """Parse and refine Python versions based on specifiers."""
-    valid_versions = {f"{major}.{minor}" for major in range(3, 12) for minor in range(0, 14)}
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version
+
+    candidates = [(ver, Version(ver)) for ver in (f"{major}.{minor}" for major in range(3, 12) for minor in range(0, 14))]
+    combined = SpecifierSet()
     for spec in specifiers:
-        valid_versions = {ver for ver in valid_versions if Version(ver) in spec}
-    return valid_versions
+        combined &= spec
+    return {ver for ver, parsed in candidates if parsed in combined}
 
 def determine_compatible_python_versions(requirements_file: str):
     """Determine compatible Python versions based on requirements."""
+    from packaging.specifiers import SpecifierSet
+
     packages = read_requirements(requirements_file)
     specifiers = []
 
-    for package, version in packages:
-        metadata = fetch_metadata_from_pypi(package, version)
-        requires_python = extract_requires_python(metadata)
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+        requires_list = list(executor.map(lambda pkg: fetch_requires_python(*pkg), packages))
+
+    for (package, version), requires_python in zip(packages, requires_list):
         if requires_python:
             print(f"{package}=={version} requires Python: {requires_python}")
             specifiers.append(SpecifierSet(requires_python))
@@ -61,22 +117,25 @@ def determine_compatible_python_versions(requirements_file: str):
 
     compatible_versions = parse_python_versions(specifiers)
     if compatible_versions:
-        sorted_versions = sorted(compatible_versions, key=Version)  # Semantic sorting
+        sorted_versions = sorted(compatible_versions, key=lambda ver: tuple(map(int, ver.split("."))))  # Numeric (major, minor) sorting
         print(f"Compatible Python versions: {sorted_versions}")
     else:
         print("Could not determine compatible Python versions. Check manually.")
 
 
-def main():
+# Built once at import so repeated main() calls only parse arguments.
+_PARSER = argparse.ArgumentParser(description="Determine compatible Python versions from a requirements.txt file.")
+_PARSER.add_argument(
+    "requirements_file",
+    nargs="?",
+    default="requirements.txt",
+    help="Path to the requirements.txt file (default: requirements.txt)",
+)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function to handle command-line arguments."""
-    parser = argparse.ArgumentParser(description="Determine compatible Python versions from a requirements.txt file.")
-    parser.add_argument(
-        "requirements_file",
-        nargs="?",
-        default="requirements.txt",
-        help="Path to the requirements.txt file (default: requirements.txt)",
-    )
-    args = parser.parse_args()
+    args = _PARSER.parse_args(argv)
     determine_compatible_python_versions(args.requirements_file)
 
 
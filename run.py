@@ -1,137 +1,225 @@
 import argparse
-import requests
+import functools
+import os
 import re
-from typing import List, Dict
-import gradio as gr
-
-def get_torchvision_matrix(url: str = "https://raw.githubusercontent.com/pytorch/vision/refs/heads/main/README.md") -> Dict[str, str]:
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional
+
+# Network, cache and UI dependencies are imported on first use so `--help` stays fast.
+if TYPE_CHECKING:
+    import diskcache
+    import requests
+
+# Patterns for the README matrix and the wheel index are compiled once at import time.
+_TABLE_HEADER_RE = re.compile(r"^\| `torch` [ \t]*\| `torchvision` [ \t]*\| Python [ \t]*\|.*$", re.MULTILINE)
+_NUMERIC_RE = re.compile(r"\d+\.\d+$")
+# Locates a wheel link in the raw index bytes and captures its fields in the same scan.
+_WHEEL_HREF_RE = re.compile(
+    rb'href="[^"]*?(?P<package>torch(?:audio|vision|tensorrt|rec|tune)?)'
+    rb"-(?P<version>[\d\.]+)"
+    rb"(?:%2B(?P<build_variant>[\w\.]+))?"
+    rb"-cp(?P<py_major>\d)(?P<py_minor>\d+)"
+    rb"-cp\d+"
+    rb'-[\w_\.]+\.whl"'
+)
+
+class Wheel(NamedTuple):
     """
-    Fetch and parse the Torch and TorchVision compatibility matrix from the README file.
-    Includes older versions listed under the `<details>` section.
-    Returns a dictionary mapping Torch versions to TorchVision versions.
+    Details parsed from a single wheel filename.
     """
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise RuntimeError(f"Failed to fetch data from {url}")
+    package: str
+    version: str
+    build_variant: str
+    python_version: str
 
-    content = response.text
 
-    # Find the compatibility table sections, including older versions
-    table_pattern = re.compile(
-        r"\| `torch` \s*\| `torchvision` \s*\| Python \s*\|.*?\n((?:\|.*?\n)+)",  # Main table
-        re.DOTALL
-    )
-    older_versions_pattern = re.compile(
-        r"<details>.*?\| `torch` \s*\| `torchvision` \s*\| Python \s*\|.*?\n((?:\|.*?\n)+).*?</details>",
-        re.DOTALL
-    )
+# Downloaded pages are kept on disk and revalidated with conditional requests.
+_CACHE_DIR = os.path.expanduser("~/.cache/torchversionspecifier")
+_CACHE_EXPIRE = 86400
 
-    # Match main table
-    main_match = table_pattern.search(content)
-    older_versions_match = older_versions_pattern.search(content)
 
-    if not main_match:
-        raise ValueError("TorchVision compatibility table not found in the README.")
+@functools.lru_cache(maxsize=None)
+def _session() -> "requests.Session":
+    """
+    Shared keep-alive session for the README and wheel index fetches.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
 
-    # Extract both sections
-    main_table_content = main_match.group(1)
-    older_table_content = older_versions_match.group(1) if older_versions_match else ""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.3)))
+    return session
 
-    # Combine main and older sections
-    combined_table_content = f"{main_table_content}\n{older_table_content}"
 
-    # Parse the combined table rows into a dictionary
-    compatibility = {}
-    for row in combined_table_content.strip().split("\n"):
-        columns = [col.strip(" `") for col in row.split("|")[1:-1]]  # Strip ` and whitespace
-        if len(columns) >= 2:  # Ensure valid data row
-            torch_version, torchvision_version = columns[:2]
-            # Skip invalid torch versions
-            try:
-                float(torch_version)  # Validates if torch_version is a number
-            except ValueError:
-                continue  # Skip non-numeric versions
-            compatibility[torch_version] = torchvision_version
+@functools.lru_cache(maxsize=None)
+def _cache() -> "diskcache.Cache":
+    """
+    On-disk cache shared with reqreader.py.
+    """
+    import diskcache
+
+    return diskcache.Cache(_CACHE_DIR)
 
-    return compatibility
 
-def fetch_whl_list(url: str = "https://download.pytorch.org/whl/torch_stable.html") -> List[str]:
+def _conditional_headers(cached: Optional[Dict[str, str]]) -> Dict[str, str]:
     """
-    Fetch and parse the list of wheel files from PyTorch's stable wheel index.
+    Build revalidation headers from the validators stored alongside a cached response.
+    """
+    headers = {}
+    if cached:
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+    return headers
+
+
+def fetch_cached_text(url: str) -> str:
     """
-    response = requests.get(url)
+    Fetch the body of `url`, reusing the on-disk copy when the server answers 304 Not Modified.
+    """
+    cached = _cache().get(("page", url))
+    response = _session().get(url, headers=_conditional_headers(cached))
+    if response.status_code == 304 and cached:
+        return cached["text"]
     if response.status_code != 200:
         raise RuntimeError(f"Failed to fetch data from {url}")
 
-    html_content = response.text
-
-    # Extract all .whl links (ignoring directory hierarchy)
-    wheel_files = re.findall(r'href=".*?(torch[\w\.\-\+%]+\.whl)"', html_content)
-    return wheel_files
+    _cache().set(("page", url), {
+        "last_modified": response.headers.get("Last-Modified"),
+        "etag": response.headers.get("ETag"),
+        "text": response.text,
+    }, expire=_CACHE_EXPIRE)
+    return response.text
 
 
-def parse_wheel_file(wheel_file: str) -> Dict[str, str]:
+def _table_rows(content: str) -> List[str]:
     """
-    Extract details from a wheel filename, handling a variety of build variants.
+    Return the `|`-prefixed rows that directly follow the first compatibility table header in `content`.
     """
-    match = re.search(
-        r"(?P<package>torch(?:audio|vision|tensorrt|rec|tune)?)"
-        r"-(?P<version>[\d\.]+)"
-        r"(?:%2B(?P<build_variant>[\w\.]+))?"
-        r"-cp(?P<py_major>\d)(?P<py_minor>\d+)"
-        r"-cp\d+"
-        r"-[\w_\.]+\.whl",
-        wheel_file
-    )
-    if match:
-        return {
-            "package": match.group("package"),
-            "version": match.group("version"),
-            "build_variant": match.group("build_variant") or "none",
-            "python_version": f"{match.group('py_major')}.{match.group('py_minor')}",
-        }
-    return {}
+    match = _TABLE_HEADER_RE.search(content)
+    if not match:
+        return []
+
+    rows = []
+    for line in content[match.end() + 1:].splitlines():
+        if not line.startswith("|"):
+            break
+        rows.append(line)
+    return rows
 
 
-def find_compatible_whl_files(python_version: str, cuda_version: str = None, build_variant: str = None) -> List[Dict[str, str]]:
+@functools.lru_cache(maxsize=4)
+def get_torchvision_matrix(url: str = "https://raw.githubusercontent.com/pytorch/vision/refs/heads/main/README.md") -> Dict[str, str]:
     """
-    Find compatible wheel files for the given Python version, CUDA version, and optional build variant.
+    Fetch and parse the Torch and TorchVision compatibility matrix from the README file.
+    Includes older versions listed under the `<details>` section.
+    Returns a dictionary mapping Torch versions to TorchVision versions.
+    Results are memoized per URL for the life of the process; callers must not mutate them.
     """
-    wheel_files = fetch_whl_list()
-    compatible_files = []
+    content = fetch_cached_text(url)
 
-    for wheel_file in wheel_files:
-        details = parse_wheel_file(wheel_file)
-        if details:
-            # Match Python version
-            if details["python_version"] != python_version:
-                continue
+    # Find the compatibility table sections, including older versions
+    main_rows = _table_rows(content)
+    if not main_rows:
+        raise ValueError("TorchVision compatibility table not found in the README.")
 
-            # Match CUDA version if provided
-            if cuda_version and cuda_version not in details["build_variant"]:
-                continue
+    _, has_details, details_content = content.partition("<details>")
+    older_rows = _table_rows(details_content.partition("</details>")[0]) if has_details else []
 
-            # Match specific build variant if provided
-            if build_variant and details["build_variant"] != build_variant:
+    # Parse the combined table rows into a dictionary
+    compatibility = {}
+    for row in main_rows + older_rows:
+        columns = row.split("|", 3)  # Only the first two columns are needed
+        if len(columns) == 4:  # Ensure valid data row
+            torch_version = columns[1].strip(" `")  # Strip ` and whitespace
+            torchvision_version = columns[2].strip(" `")
+            # Keep only `major.minor` torch versions (skips `main` / `nightly` and three-part releases)
+            if not _NUMERIC_RE.match(torch_version):
                 continue
+            compatibility[torch_version] = torchvision_version
 
-            compatible_files.append(details)
+    return compatibility
 
-    return compatible_files
+def _wheel_from_match(match: "re.Match[bytes]") -> Wheel:
+    """
+    Build a Wheel from a `_WHEEL_HREF_RE` match over the raw index bytes.
+    """
+    build_variant = match.group("build_variant")
+    return Wheel(
+        package=match.group("package").decode(),
+        version=match.group("version").decode(),
+        build_variant=build_variant.decode() if build_variant else "none",
+        python_version=f"{match.group('py_major').decode()}.{match.group('py_minor').decode()}",
+    )
 
 
-def deduplicate_files(file_list: List[Dict[str, str]]) -> List[Dict[str, str]]:
+def fetch_whl_list(url: str = "https://download.pytorch.org/whl/torch_stable.html") -> Iterator[Wheel]:
     """
-    Remove duplicates from the list of files based on 'package', 'version', and 'build_variant'.
+    Fetch and parse the list of wheel files from PyTorch's stable wheel index.
+    Wheels are yielded while the index is still downloading; the raw bytes are never decoded,
+    and only the parsed records are cached.
     """
+    cached = _cache().get(("wheel_records", url))
+    with _session().get(url, headers=_conditional_headers(cached), stream=True) as response:
+        if response.status_code == 304 and cached:
+            for record in cached["wheels"]:
+                yield Wheel(*record)
+            return
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch data from {url}")
+
+        # Extract all .whl links (ignoring directory hierarchy)
+        records = []
+        for line in response.iter_lines():
+            for match in _WHEEL_HREF_RE.finditer(line):
+                wheel = _wheel_from_match(match)
+                # Plain tuples keep the cache independent of the module Wheel is pickled from
+                records.append(tuple(wheel))
+                yield wheel
+
+        _cache().set(("wheel_records", url), {
+            "last_modified": response.headers.get("Last-Modified"),
+            "etag": response.headers.get("ETag"),
+            "wheels": records,
+        }, expire=_CACHE_EXPIRE)
+
+
+@functools.lru_cache(maxsize=4)
+def _wheel_index(url: str = "https://download.pytorch.org/whl/torch_stable.html") -> Dict[str, List[Wheel]]:
+    """
+    Group the unique wheels from the index by Python version, preserving index order.
+    Duplicates (same package, version, and build variant) are dropped while grouping.
+    """
+    index = defaultdict(list)
     seen = set()
-    unique_files = []
-    for file in file_list:
-        identifier = (file['package'], file['version'], file['build_variant'])
-        if identifier not in seen:
-            seen.add(identifier)
-            unique_files.append(file)
-    return unique_files
+    for wheel in fetch_whl_list(url):
+        if wheel not in seen:
+            seen.add(wheel)
+            index[wheel.python_version].append(wheel)
+    return dict(index)
+
+
+def find_compatible_whl_files(python_version: str, cuda_version: str = None, build_variant: str = None) -> List[Wheel]:
+    """
+    Find compatible wheel files for the given Python version, CUDA version, and optional build variant.
+    """
+    compatible_files = []
+
+    for wheel in _wheel_index().get(python_version, ()):
+        # Match CUDA version if provided
+        if cuda_version and cuda_version not in wheel.build_variant:
+            continue
+
+        # Match specific build variant if provided
+        if build_variant and wheel.build_variant != build_variant:
+            continue
+
+        compatible_files.append(wheel)
+
+    return compatible_files
 
 
 def interactive_mode():
@@ -139,26 +227,27 @@ def interactive_mode():
     cuda_version = input("Enter your CUDA version (e.g., 121 for CUDA 12.1) or leave blank for any: ").strip() or None
     build_variant = input("Enter build variant (e.g., cpu, cu121) or leave blank for any: ").strip() or None
 
-    compatible_files = find_compatible_whl_files(python_version, cuda_version, build_variant)
-    deduplicated_files = deduplicate_files(compatible_files)
+    deduplicated_files = find_compatible_whl_files(python_version, cuda_version, build_variant)
 
     if deduplicated_files:
         print(f"Compatible wheel files for Python {python_version}, CUDA {cuda_version or 'any'}, and variant {build_variant or 'any'}:")
         for file in deduplicated_files:
-            print(f"  - {file['package']} version: {file['version']} (build: {file['build_variant']})")
+            print(f"  - {file.package} version: {file.version} (build: {file.build_variant})")
     else:
         print(f"No compatible wheel files found for Python {python_version}, CUDA {cuda_version or 'any'}, and variant {build_variant or 'any'}.")
 
 
-def main():
-    parser = argparse.ArgumentParser(description="PyTorch Version Selector")
-    parser.add_argument("-i", "--interactive", action="store_true", help="Launch interactive mode")
-    parser.add_argument("-g", "--gradio", action="store_true", help="Launch Gradio interface")
-    parser.add_argument("-p", "--python", type=str, help="Specify Python version (e.g., 3.10)")
-    parser.add_argument("-c", "--cuda", type=str, help="Specify CUDA version (e.g., 121 for CUDA 12.1)")
-    parser.add_argument("-b", "--build", type=str, help="Specify build variant (e.g., cpu, cu121)")
+# Built once at import so repeated main() calls from a driver script only parse arguments.
+_PARSER = argparse.ArgumentParser(description="PyTorch Version Selector")
+_PARSER.add_argument("-i", "--interactive", action="store_true", help="Launch interactive mode")
+_PARSER.add_argument("-g", "--gradio", action="store_true", help="Launch Gradio interface")
+_PARSER.add_argument("-p", "--python", type=str, help="Specify Python version (e.g., 3.10)")
+_PARSER.add_argument("-c", "--cuda", type=str, help="Specify CUDA version (e.g., 121 for CUDA 12.1)")
+_PARSER.add_argument("-b", "--build", type=str, help="Specify build variant (e.g., cpu, cu121)")
+
 
-    args = parser.parse_args()
+def main(argv: Optional[List[str]] = None):
+    args = _PARSER.parse_args(argv)
 
     if args.gradio:
         launch_gradio_interface()
@@ -166,28 +255,29 @@ def main():
         interactive_mode()
     elif args.python:
         try:
-            # Fetch compatibility matrix for TorchVision
-            torchvision_matrix = get_torchvision_matrix()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # Fetch compatibility matrix for TorchVision while the wheel index downloads
+                matrix_future = executor.submit(get_torchvision_matrix)
 
-            # Find compatible Torch versions
-            compatible_files = find_compatible_whl_files(args.python, args.cuda, args.build)
-            deduplicated_files = deduplicate_files(compatible_files)
+                # Find compatible Torch versions
+                deduplicated_files = find_compatible_whl_files(args.python, args.cuda, args.build)
+                torchvision_matrix = matrix_future.result()
 
             if deduplicated_files:
                 print(f"Compatible versions for Python {args.python}, CUDA {args.cuda or 'any'}, and variant {args.build or 'any'}:\n")
                 for file in deduplicated_files:
-                    if file["package"] == "torch":
-                        print(f"\ntorch=={file['version']}+{file['build_variant']}")
-                        print(f"     torchaudio=={file['version']}+{file['build_variant']}")
+                    if file.package == "torch":
+                        print(f"\ntorch=={file.version}+{file.build_variant}")
+                        print(f"     torchaudio=={file.version}+{file.build_variant}")
 
                         # Match TorchVision versions (using the compatibility matrix)
-                        torch_major = '.'.join(file['version'].split('.')[:2])  # Extract major and minor version of Torch
-                        torch_minor = file['version'].split('.')[-1]  # Extract the minor release of Torch
+                        torch_major = '.'.join(file.version.split('.')[:2])  # Extract major and minor version of Torch
+                        torch_minor = file.version.split('.')[-1]  # Extract the minor release of Torch
 
                         if torch_major in torchvision_matrix:
                             torchvision_major = torchvision_matrix[torch_major]
                             torchvision_version = f"{torchvision_major}.{torch_minor}"
-                            print(f"     torchvision=={torchvision_version}+{file['build_variant']}")
+                            print(f"     torchvision=={torchvision_version}+{file.build_variant}")
                         else:
                             print("     - No matching torchvision version found.")
             else:
@@ -195,35 +285,36 @@ def main():
         except Exception as e:
             print(f"An error occurred: {e}")
     else:
-        parser.print_help()
+        _PARSER.print_help()
 
 def launch_gradio_interface():
     """
     Launches a Gradio interface for the utility.
     """
+    import gradio as gr
+
     def gradio_interface(python_version, cuda_version, build_variant):
         try:
-            compatible_files = find_compatible_whl_files(python_version, cuda_version, build_variant)
-            deduplicated_files = deduplicate_files(compatible_files)
+            deduplicated_files = find_compatible_whl_files(python_version, cuda_version, build_variant)
 
             if not deduplicated_files:
                 return f"No compatible wheel files found for Python {python_version}, CUDA {cuda_version or 'any'}, and variant {build_variant or 'any'}."
 
             results = []
             for file in deduplicated_files:
-                if file["package"] == "torch":
-                    result = [f"torch=={file['version']}+{file['build_variant']}"]
-                    result.append(f"torchaudio=={file['version']}+{file['build_variant']}")
+                if file.package == "torch":
+                    result = [f"torch=={file.version}+{file.build_variant}"]
+                    result.append(f"torchaudio=={file.version}+{file.build_variant}")
 
                     # Fetch compatibility matrix for TorchVision
                     torchvision_matrix = get_torchvision_matrix()
-                    torch_major = '.'.join(file['version'].split('.')[:2])  # Extract major and minor version of Torch
-                    torch_minor = file['version'].split('.')[-1]  # Extract the minor release of Torch
+                    torch_major = '.'.join(file.version.split('.')[:2])  # Extract major and minor version of Torch
+                    torch_minor = file.version.split('.')[-1]  # Extract the minor release of Torch
 
                     if torch_major in torchvision_matrix:
                         torchvision_major = torchvision_matrix[torch_major]
                         torchvision_version = f"{torchvision_major}.{torch_minor}"
-                        result.append(f"torchvision=={torchvision_version}+{file['build_variant']}")
+                        result.append(f"torchvision=={torchvision_version}+{file.build_variant}")
                     else:
                         result.append("No matching torchvision version found.")
 